@@ -1,8 +1,18 @@
 from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+import functools
 from dotenv import load_dotenv
 from openai import OpenAI
-import requests
-import json
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from urllib3.util.retry import Retry
+import requests_cache
+import aiohttp
+import asyncio
+import orjson
 import os
 
 # Get env values
@@ -17,10 +27,133 @@ client = OpenAI(
   api_key = api_key
 )
 
+# Retry policy shared by the requests sessions and the aiohttp fan-out
+MAX_RETRIES = 3
+RETRY_BACKOFF_FACTOR = 0.2
+
+# Seconds a cached Spark UI response is replayed from disk before it is fetched again
+HTTP_CACHE_EXPIRE_AFTER = 3600
+# Only finished jobs and stages are immutable, anything else is always fetched from the driver
+_TERMINAL_STATUSES = frozenset(("SUCCEEDED", "COMPLETE", "FAILED", "SKIPPED"))
+
+# True when every record (job, stage attempt) has reached a terminal status and can't change any more
+def is_finished(records):
+    return bool(records) and all(isinstance(record, dict) and record.get("status") in _TERMINAL_STATUSES for record in records)
+
+# Keep-alive session with connection pooling so repeated Spark UI calls reuse the same connections,
+# finished jobs/stages are cached in sqlite (user cache dir) so re-running against the same application doesn't fetch them again.
+# The cache is read only: responses are stored explicitly by the callers that already parsed them (see _cache_if_finished)
+def create_session():
+    session = requests_cache.CachedSession("spark_ui_cache", backend="sqlite", use_cache_dir=True, read_only=True)
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=Retry(total=MAX_RETRIES, backoff_factor=RETRY_BACKOFF_FACTOR))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+_SESSION = None
+
+# The shared session (and its sqlite file) is only created once an environment needs it, not on import
+def get_shared_session():
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = create_session()
+    return _SESSION
+
+# Parsed JSON only produces plain dicts and lists, so an exact type lookup is enough to spot containers
+_CONTAINER_TYPES = frozenset((dict, list))
+
+# Upper bound on in-flight Spark UI requests so the driver isn't overwhelmed
+MAX_CONCURRENT_REQUESTS = 32
+
+# A 200 body that isn't JSON (proxy / login HTML page, truncated body) counts as a failed request
+def _loads_or_none(content):
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return None
+
+# Connection errors are retried with the same backoff as the requests sessions, anything else gives None
+async def _get_json(session, semaphore, url):
+    async with semaphore:
+        for attempt in range(MAX_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF_FACTOR * 2 ** (attempt - 1))
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return _loads_or_none(await response.read())
+                    return None
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                continue
+        return None
+
+async def _gather_json(urls, headers=None):
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    # One connector per fan-out, its connections are kept alive across all the urls of the batch
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS)
+    async with aiohttp.ClientSession(headers=headers, connector=connector) as session:
+        return await asyncio.gather(*[_get_json(session, semaphore, url) for url in urls])
+
+def _session_get_json(session, url):
+    try:
+        response = session.get(url)
+    except RequestException:
+        return None
+    if response.status_code == 200:
+        return _loads_or_none(response.content)
+    return None
+
+# Fetch all the urls concurrently, keeping the order of the given urls (None for failed requests)
+def fetch_all_json(urls, session, headers=None):
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_gather_json(urls, headers))
+    # asyncio.run can't be nested inside a running loop (Jupyter / Databricks notebooks),
+    # fan out on threads over the pooled, retrying requests session instead
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        return list(executor.map(functools.partial(_session_get_json, session), urls))
+
+# Group the stage attempts of a bulk /stages response by stage id, oldest attempt first like /stages/{stage_id}
+def group_stage_attempts(stages):
+    stages_by_id = {}
+    for stage in stages:
+        stages_by_id.setdefault(stage["stageId"], []).append(stage)
+    for attempts in stages_by_id.values():
+        attempts.sort(key=itemgetter("attemptId"))
+    return stages_by_id
+
+# Records to check for a terminal status: the job itself, or every attempt of every stage of the job
+def _job_records(job_details):
+    return [job_details]
+
+def _stage_records(stage_details):
+    return [attempt for attempts in stage_details["stages"] for attempt in (attempts or [None])]
+
+# Memoize a job_id keyed lookup on the environment instance once its records are finished,
+# lookups that failed (None) or are still running are fetched again on the next call
+def cache_by_job_id(records):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, job_id):
+            key = (method.__name__, job_id)
+            if key in self._cache:
+                return self._cache[key]
+            result = method(self, job_id)
+            if result is not None and is_finished(records(result)):
+                self._cache[key] = result
+            return result
+        return wrapper
+    return decorator
+
 # Abstract Base Class for Spark Environment
 class SparkEnvironment(ABC):
-    def __init__(self):
+    # Environments that need their own session (e.g. one carrying credentials) pass it in, the rest share one
+    def __init__(self, session=None):
         self.application_id = None
+        self._session = session if session is not None else get_shared_session()
+        # Per-instance cache of Spark UI lookups, scoped to the application the instance was built for
+        self._cache = {}
     
     @abstractmethod
     def get_application_id(self):
@@ -41,66 +174,154 @@ class SparkEnvironment(ABC):
     @abstractmethod
     def get_task_details(self):
         pass
+
+    @abstractmethod
+    def get_all_task_details(self):
+        pass
     
     def json_compaction(self, json_data):
-        if isinstance(json_data, dict):
-            return {k: self.json_compaction(v) for k, v in json_data.items() if v not in [0, 0.0, "", [], {}, None]}
-        # If any list contains a single value which is not 0 then keep the whole list else return blank list
-        elif isinstance(json_data, list):
-            for item in json_data:
-                if item not in [0.0, {}, [], None]:
-                    return [self.json_compaction(item) for item in json_data]
-            return []
-        else: 
-            return json_data
-
+        # Iterative walk: every stack entry is compacted and then stored at parent[key]
+        root = [json_data]
+        stack = deque([(root, 0, json_data)])
+        # Bound once, these are hit for every node
+        pop, push = stack.pop, stack.append
+        while stack:
+            parent, key, value = pop()
+            value_type = type(value)
+            if value_type is dict:
+                compacted = {}
+                for k, v in value.items():
+                    # For JSON values falsy is exactly 0, 0.0, False, "", None, [] and {}
+                    if not v:
+                        continue
+                    if type(v) in _CONTAINER_TYPES:
+                        # Placeholder keeps the key order, the real value is filled in when popped
+                        compacted[k] = None
+                        push((compacted, k, v))
+                    else:
+                        compacted[k] = v
+            # If any list contains a single value which is not 0 then keep the whole list else return blank list
+            # (an empty string still counts as a value here)
+            elif value_type is list:
+                if any(item or item == "" for item in value):
+                    compacted = list(value)
+                    for i, item in enumerate(value):
+                        if type(item) in _CONTAINER_TYPES:
+                            push((compacted, i, item))
+                else:
+                    compacted = []
+            else:
+                compacted = value
+            parent[key] = compacted
+        return root[0]
+
+    # Store a response in the disk cache once every record it carries is finished
+    def _cache_if_finished(self, response, records):
+        if not response.from_cache and is_finished(records):
+            expires = datetime.now(timezone.utc) + timedelta(seconds=HTTP_CACHE_EXPIRE_AFTER)
+            self._session.cache.save_response(response, expires=expires)
+
+    # Stage attempts for the given stage ids, taken from a single bulk /stages call.
+    # Finished stages are kept on the instance, stages still running are fetched again on every call
+    def _collect_stages(self, stage_ids, stages_url, headers=None):
+        finished_stages = self._cache.setdefault("finished_stages", {})
+        stages_by_id = {stage_id: finished_stages[stage_id] for stage_id in stage_ids if stage_id in finished_stages}
+        missing_stage_ids = [stage_id for stage_id in stage_ids if stage_id not in stages_by_id]
+
+        # A failed bulk call is remembered, later calls go straight to the per-stage fallback
+        if missing_stage_ids and not self._cache.get("bulk_stages_failed"):
+            response = self._session.get(stages_url, params={"details": "true"})
+            if response.status_code != 200:
+                all_stages = {}
+                self._cache["bulk_stages_failed"] = True
+            else:
+                all_stages = group_stage_attempts(orjson.loads(response.content))
+                self._cache_if_finished(response, [attempt for attempts in all_stages.values() for attempt in attempts])
+            for stage_id, attempts in all_stages.items():
+                if is_finished(attempts):
+                    finished_stages[stage_id] = attempts
+            for stage_id in missing_stage_ids:
+                if stage_id in all_stages:
+                    stages_by_id[stage_id] = all_stages[stage_id]
+            missing_stage_ids = [stage_id for stage_id in missing_stage_ids if stage_id not in stages_by_id]
+
+        # Fall back to one call per stage for anything the bulk response didn't carry
+        if missing_stage_ids:
+            stage_url = stages_url + "/"
+            missing_stages = fetch_all_json([stage_url + str(stage_id) for stage_id in missing_stage_ids], self._session, headers=headers)
+            for stage_id, stage_details in zip(missing_stage_ids, missing_stages):
+                if stage_details is not None:
+                    stages_by_id[stage_id] = stage_details
+                    if is_finished(stage_details):
+                        finished_stages[stage_id] = stage_details
+        return [stages_by_id.get(stage_id) for stage_id in stage_ids]
+
+    # Stream the answer back chunk by chunk instead of waiting for the whole completion
     def ask_openai(self, question, formatted_data):
+        # Compact JSON instead of the dict's repr keeps the prompt (and its token count) small
+        serialized_data = orjson.dumps(formatted_data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_OMIT_MICROSECONDS).decode()
         response = client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role":"user", "content":f"{question} \n {formatted_data}"}],
-            stream=False,
+            messages=[{"role":"user", "content":f"{question} \n {serialized_data}"}],
+            stream=True,
         )
-        return response.choices[0].message.content
+        for chunk in response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
 
 # Class for Databricks Spark Environment
 class DatabricksSparkEnvironment(SparkEnvironment):
     def __init__(self, databricks_token, databricks_instance, databricks_application_id = None):
-        super().__init__()
+        # Dedicated session so the token is never sent by the other environments
+        auth_headers = {"Authorization": f"Bearer {databricks_token}"}
+        session = create_session()
+        session.headers.update(auth_headers)
+        super().__init__(session=session)
         self.databricks_token = databricks_token
         self.databricks_instance = databricks_instance
         self.databricks_application_id = databricks_application_id
+        self._auth_headers = auth_headers
+        # Base URLs of this application, built once
+        self._application_endpoint = f"/api/v1/applications/{databricks_application_id}"
+        self._application_url = f"{databricks_instance}{self._application_endpoint}"
+        self._stages_url = f"{self._application_url}/stages"
 
     def _databricks_api_get(self, endpoint):
         url = f"{self.databricks_instance}{endpoint}"
-        headers = {"Authorization": f"Bearer {self.databricks_token}"}
-        response = requests.get(url, headers=headers)
+        response = self._session.get(url)
         if response.status_code == 200:
-            return response.json()
+            return orjson.loads(response.content)
         else:
             raise Exception(f"Failed to fetch data from Databricks. Status: {response.status_code}")
 
     def get_application_id(self):
+        # Stable for the life of the Spark context, look it up once
+        if self.application_id is not None:
+            return self.application_id
         jobs = self._databricks_api_get("/api/2.0/jobs/list")
         self.application_id = jobs['jobs'][0]['job_id'] if jobs else None
         return self.application_id
 
     def get_all_job_details_of_application(self):
-        jobs_url = f"/api/v1/applications/{self.databricks_application_id}/jobs"
-        response = requests.get(jobs_url)
+        jobs_url = f"{self._application_url}/jobs"
+        response = self._session.get(jobs_url)
         if response.status_code == 200:
-            all_jobs = response.json()
+            all_jobs = orjson.loads(response.content)
             return all_jobs
         return None
     
+    @cache_by_job_id(_job_records)
     def get_specific_job_details(self, job_id):
-        job_url = f"/api/v1/applications/{self.databricks_application_id}/jobs/{job_id}"
-        response = requests.get(job_url)
+        job_url = f"{self._application_url}/jobs/{job_id}"
+        response = self._session.get(job_url)
         if response.status_code == 200:
-            job_details = response.json()
+            job_details = orjson.loads(response.content)
+            self._cache_if_finished(response, [job_details])
             return job_details
         return None
 
+    @cache_by_job_id(_stage_records)
     def get_stage_details(self, job_id):
         job_details = self.get_specific_job_details(job_id)
         if not job_details:
@@ -110,23 +331,21 @@ class DatabricksSparkEnvironment(SparkEnvironment):
         # Extract stage IDs from the job details
         stage_ids = job_details.get('stageIds', [])
         
-        stages = []
-        for stage_id in stage_ids:
-            stage_url = f"/api/v1/applications/{self.databricks_application_id}/stages/{stage_id}"
-            stage_details = self._databricks_api_get(stage_url).json()
-            stages.append(stage_details)
+        stages = self._collect_stages(stage_ids, self._stages_url, headers=self._auth_headers)
         return {
             "job_id" : job_id,
             "stages" : stages
         }
 
     def get_task_details(self, stage_id):
-        task_url = f"/api/v1/applications/{self.databricks_application_id}/stages/{stage_id}"
-        response = self._databricks_api_get(stage_url).json()
-        if response.status_code == 200:
-            task_details = response.json()
-            return task_details
-        return None
+        task_url = f"{self._application_endpoint}/stages/{stage_id}"
+        task_details = self._databricks_api_get(task_url)
+        return task_details
+
+    def get_all_task_details(self, stage_and_attempt_ids):
+        stage_url = self._stages_url + "/"
+        task_urls = [stage_url + str(mappedIds.get("stageId")) for mappedIds in stage_and_attempt_ids]
+        return fetch_all_json(task_urls, self._session, headers=self._auth_headers)
 
     def get_executor_details(self):
         cluster_id = "<your-cluster-id>"  # Fetch dynamically if needed
@@ -140,31 +359,40 @@ class NonDatabricksSparkEnvironment(SparkEnvironment):
         super().__init__()
         self.spark_master_url = spark_master_url
         self.NonDatabricksSparkEnvironment_application_id = NonDatabricksSparkEnvironment_application_id
+        # Base URLs of this application, built once
+        self._application_url = f"{spark_master_url}/applications/{NonDatabricksSparkEnvironment_application_id}"
+        self._stages_url = f"{self._application_url}/stages"
 
     def get_application_id(self):
+        # Stable for the life of the Spark context, look it up once
+        if self.application_id is not None:
+            return self.application_id
         url = f"{self.spark_master_url}/applications"
-        response = requests.get(url)
+        response = self._session.get(url)
         if response.status_code == 200:
-            applications = response.json()
+            applications = orjson.loads(response.content)
             self.application_id = applications[0]['id'] if applications else None
         return self.application_id
     
     def get_all_job_details_of_application(self):
-        jobs_url = f"{self.local_spark_ui_url}/applications/{self.NonDatabricksSparkEnvironment_application_id}/jobs"
-        response = requests.get(jobs_url)
+        jobs_url = f"{self._application_url}/jobs"
+        response = self._session.get(jobs_url)
         if response.status_code == 200:
-            all_jobs = response.json()
+            all_jobs = orjson.loads(response.content)
             return all_jobs
         return None
     
+    @cache_by_job_id(_job_records)
     def get_specific_job_details(self, job_id):
-        job_url = f"{self.spark_master_url}/applications/{self.NonDatabricksSparkEnvironment_application_id}/jobs/{job_id}"
-        response = requests.get(job_url)
+        job_url = f"{self._application_url}/jobs/{job_id}"
+        response = self._session.get(job_url)
         if response.status_code == 200:
-            job_details = response.json()
+            job_details = orjson.loads(response.content)
+            self._cache_if_finished(response, [job_details])
             return job_details
         return None
 
+    @cache_by_job_id(_stage_records)
     def get_stage_details(self, job_id):
         job_details = self.get_specific_job_details(job_id)
         if not job_details:
@@ -174,11 +402,7 @@ class NonDatabricksSparkEnvironment(SparkEnvironment):
         # Extract stage IDs from the job details
         stage_ids = job_details.get('stageIds', [])
         
-        stages = []
-        for stage_id in stage_ids:
-            stage_url = f"{self.spark_master_url}/applications/{self.NonDatabricksSparkEnvironment_application_id}/stages/{stage_id}"
-            stage_details = requests.get(stage_url).json()
-            stages.append(stage_details)
+        stages = self._collect_stages(stage_ids, self._stages_url)
         return {
             "job_id" : job_id,
             "stages" : stages
@@ -186,16 +410,21 @@ class NonDatabricksSparkEnvironment(SparkEnvironment):
 
 
     def get_task_details(self, stage_id):
-        task_url = f"{self.spark_master_url}/applications/{self.NonDatabricksSparkEnvironment_application_id}/stages/{stage_id}/taskSummary"
-        response = requests.get(stage_url).json()
+        task_url = f"{self._stages_url}/{stage_id}/taskSummary"
+        response = self._session.get(task_url)
         if response.status_code == 200:
-            task_details = response.json()
+            task_details = orjson.loads(response.content)
             return task_details
         return None
 
+    def get_all_task_details(self, stage_and_attempt_ids):
+        stage_url = self._stages_url + "/"
+        task_urls = [f"{stage_url}{mappedIds.get('stageId')}/taskSummary" for mappedIds in stage_and_attempt_ids]
+        return fetch_all_json(task_urls, self._session)
+
     def get_executor_details(self):
-        executors_url = f"{self.local_spark_ui_url}/applications/{self.local_application_id}/executors"
-        executors = requests.get(executors_url).json()
+        executors_url = f"{self._application_url}/executors"
+        executors = orjson.loads(self._session.get(executors_url).content)
         return {"executors": executors}
 
 
@@ -205,32 +434,41 @@ class LocalSparkEnvironment(SparkEnvironment):
         super().__init__()
         self.local_spark_ui_url = local_spark_ui_url
         self.local_application_id = local_application_id
+        # Base URLs of this application, built once
+        self._application_url = f"{local_spark_ui_url}/applications/{local_application_id}"
+        self._stages_url = f"{self._application_url}/stages"
 
     #  Get lastest application's id
     def get_application_id(self):
+        # Stable for the life of the Spark context, look it up once
+        if self.application_id is not None:
+            return self.application_id
         url = f"{self.local_spark_ui_url}/applications"
-        response = requests.get(url)
+        response = self._session.get(url)
         if response.status_code == 200:
-            applications = response.json()
+            applications = orjson.loads(response.content)
             self.application_id = applications[0]['id'] if applications else None
         return self.application_id
 
     def get_all_job_details_of_application(self):
-        jobs_url = f"{self.local_spark_ui_url}/applications/{self.local_application_id}/jobs"
-        response = requests.get(jobs_url)
+        jobs_url = f"{self._application_url}/jobs"
+        response = self._session.get(jobs_url)
         if response.status_code == 200:
-            all_jobs = response.json()
+            all_jobs = orjson.loads(response.content)
             return all_jobs
         return None
     
+    @cache_by_job_id(_job_records)
     def get_specific_job_details(self, job_id):
-        job_url = f"{self.local_spark_ui_url}/applications/{self.local_application_id}/jobs/{job_id}"
-        response = requests.get(job_url)
+        job_url = f"{self._application_url}/jobs/{job_id}"
+        response = self._session.get(job_url)
         if response.status_code == 200:
-            job_details = response.json()
+            job_details = orjson.loads(response.content)
+            self._cache_if_finished(response, [job_details])
             return job_details
         return None
 
+    @cache_by_job_id(_stage_records)
     def get_stage_details(self, job_id):
         job_details = self.get_specific_job_details(job_id)
         if not job_details:
@@ -240,14 +478,7 @@ class LocalSparkEnvironment(SparkEnvironment):
         # Extract stage IDs from the job details
         stage_ids = job_details.get('stageIds', [])
         
-        stages = []
-        for stage_id in stage_ids:
-            stage_url = f"{self.local_spark_ui_url}/applications/{self.local_application_id}/stages/{stage_id}"
-            stage_details = requests.get(stage_url)
-            if stage_details.status_code == 200:
-                stages.append(stage_details.json())
-            else:
-                stages.append(None)
+        stages = self._collect_stages(stage_ids, self._stages_url)
         return {
             "job_id" : job_id,
             "stages" : stages
@@ -255,18 +486,23 @@ class LocalSparkEnvironment(SparkEnvironment):
 
 
     def get_task_details(self, stage_id, stage_attempt_id):
-        task_url = f"{self.local_spark_ui_url}/applications/{self.local_application_id}/stages/{stage_id}/{stage_attempt_id}/taskSummary"
-        response = requests.get(task_url)
+        task_url = f"{self._stages_url}/{stage_id}/{stage_attempt_id}/taskSummary"
+        response = self._session.get(task_url)
         print(response.status_code)
         if response.status_code == 200:
-            task_details = response.json()
+            task_details = orjson.loads(response.content)
             return task_details
         return None
 
+    def get_all_task_details(self, stage_and_attempt_ids):
+        stage_url = self._stages_url + "/"
+        task_urls = [f"{stage_url}{mappedIds.get('stageId')}/{mappedIds.get('attemptId')}/taskSummary" for mappedIds in stage_and_attempt_ids]
+        return fetch_all_json(task_urls, self._session)
+
     def get_executor_details(self):
-        executors_url = f"{self.local_spark_ui_url}/applications/{self.local_application_id}/executors"
+        executors_url = f"{self._application_url}/executors"
         
-        executors = requests.get(executors_url).json()
+        executors = orjson.loads(self._session.get(executors_url).content)
         return {"executors": executors}
 
 
@@ -342,20 +578,13 @@ def main():
     #  Get all the stage details of all the jobs of the application
     all_jobs_stage_details = [spark_env.get_stage_details(job_id = jobId) for jobId in all_job_ids]
 
-    # Get all the stage ids of all the jobs of the application
-    all_stage_ids =  []
-    for single_stage_details in all_jobs_stage_details:
-        for stage in single_stage_details.get("stages"):
-            all_stage_ids.append(stage[0].get("stageId", None))
-
-    # Get all the stage and attempt ids (mapped) of all the jobs of the application
-    all_stage_and_attempt_ids = [] 
-    for single_stage_details in all_jobs_stage_details:
-        for stage in single_stage_details.get("stages"):
-            all_stage_and_attempt_ids.append({"stageId" : stage[0].get("stageId", None), "attemptId" : stage[0].get("attemptId", None)})
+    # Get all the stage and attempt ids (mapped) of all the jobs of the application in a single pass
+    all_stage_and_attempt_ids = [{"stageId" : stage[0]["stageId"], "attemptId" : stage[0]["attemptId"]}
+                                 for single_stage_details in all_jobs_stage_details
+                                 for stage in single_stage_details.get("stages")]
 
     # Get all the task details of all the stages of all the jobs of the application
-    all_task_details = [spark_env.get_task_details(stage_id = mappedIds.get("stageId"), stage_attempt_id = mappedIds.get("attemptId")) for mappedIds in all_stage_and_attempt_ids]
+    all_task_details = spark_env.get_all_task_details(stage_and_attempt_ids = all_stage_and_attempt_ids)
     
     return_json = {
         "applicationId" : application_id,
@@ -378,21 +607,22 @@ def main():
     """
 
     # Write the collected spark matrix in a json file
-    with open('/Users/heaven-is-here/Desktop/Codes/Spark ui integration with Open AI/raw_responses/response.json', 'w') as f:
-        f.write(json.dumps(return_json))
+    with open('/Users/heaven-is-here/Desktop/Codes/Spark ui integration with Open AI/raw_responses/response.json', 'wb') as f:
+        f.write(orjson.dumps(return_json))
     
     # Remove un necessary data and make the json carry useful data
     formatted_data = spark_env.json_compaction(return_json)
 
     # Write the compacted json in a json file
-    with open('/Users/heaven-is-here/Desktop/Codes/Spark ui integration with Open AI/compacted_responses/compacted_response_test.json', 'w') as f:
-        f.write(json.dumps(return_json))
+    with open('/Users/heaven-is-here/Desktop/Codes/Spark ui integration with Open AI/compacted_responses/compacted_response_test.json', 'wb') as f:
+        f.write(orjson.dumps(formatted_data))
     
     # Write the open-ai's response in a text file
     with open("/Users/heaven-is-here/Desktop/Codes/Spark ui integration with Open AI/open_ai_response/open_ai_response.txt", "a") as f:
         f.write("\n\n\n" + "###################################################################" + 
-                "\n" + f"Application_ID = {application_id}, Job_Id = {jobId} \n\n\n\n" +
-                spark_env.ask_openai(question=question, formatted_data=formatted_data))
+                "\n" + f"Application_ID = {application_id}, Job_Id = {jobId} \n\n\n\n")
+        for answer_chunk in spark_env.ask_openai(question=question, formatted_data=formatted_data):
+            f.write(answer_chunk)
     
     
 